@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Compile the DP kernels of find_cheapest_tickets.py ahead of time with numba.pycc.
+
+This builds the extension module dp_kernels (dp_kernels.*.so) next to this
+script. find_cheapest_tickets.py picks it up automatically and then neither
+imports numba nor JIT-compiles anything at startup, which keeps the CLI fast
+for single files.
+
+Rerun this script after changing _dp_kernel_loops, _path_nodes_loops or their
+signatures; delete the .so file to go back to the JIT/NumPy kernels.
+
+Usage:
+    python build_aot.py
+"""
+
+import os
+import sys
+
+from numba.pycc import CC
+
+import find_cheapest_tickets as fct
+
+
+def main():
+    cc = CC('dp_kernels')
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+    cc.export('dp_kernel', fct.DP_KERNEL_SIGNATURE)(fct._dp_kernel_loops)
+    cc.export('path_nodes', fct.PATH_NODES_SIGNATURE)(fct._path_nodes_loops)
+
+    print(f"Compiling DP kernels into {cc.output_dir}...")
+    cc.compile()
+    print(f"✓ Built {cc.output_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,30 +11,28 @@ Both the scraper (with --connect flag) and BrowserMCP tools can connect
 to this same browser instance simultaneously.
 
 Usage:
-    python debug_browser.py
+    python debug_browser.py [--user-data-dir browser-profile]
+
+With --user-data-dir, cookies (e.g. the bahn.de consent) and the browser
+cache survive restarts of the debug browser.
 
 Then in another terminal:
     ./venv/bin/python scrape_bahn_prices.py "Origin" "Dest" --connect --output data/output.tsv
 """
 
+import argparse
 import asyncio
 import os
 import signal
 import sys
 from playwright.async_api import async_playwright
 
-# Flag to handle graceful shutdown
-shutdown_flag = False
-
-def signal_handler(_signum, _frame):
-    """Handle Ctrl+C gracefully"""
-    global shutdown_flag
-    print("\n\nShutdown signal received. Closing browser...")
-    shutdown_flag = True
-
 async def main():
     """Launch and maintain persistent debug browser"""
-    global shutdown_flag
+    parser = argparse.ArgumentParser(description='Launch a persistent Chromium with CDP on localhost:9222')
+    parser.add_argument('--user-data-dir', default='',
+                        help='Browser profile directory to keep between runs (default: temporary profile)')
+    args = parser.parse_args()
 
     print("=" * 60)
     print("Debug Browser Launcher")
@@ -51,11 +49,13 @@ async def main():
         return 1
 
     print(f"\nLoading BrowserMCP extension from: {extension_path}")
+    if args.user_data_dir:
+        print(f"Using browser profile: {os.path.abspath(args.user_data_dir)}")
 
     async with async_playwright() as p:
         # Launch persistent context with CDP enabled
         context = await p.chromium.launch_persistent_context(
-            "",  # Empty string = temporary user data directory
+            args.user_data_dir,  # Empty string = temporary user data directory
             headless=False,  # Must be headed for CDP
             locale='de-DE',
             timezone_id='Europe/Berlin',
@@ -68,14 +68,10 @@ async def main():
             ]
         )
 
-        # Create initial page
-        if context.pages:
-            page = context.pages[0]
-        else:
-            page = await context.new_page()
-
-        # Navigate to blank page
-        await page.goto("about:blank")
+        # Create initial page only if the browser did not open one
+        # (a fresh Chromium tab already shows about:blank, no navigation needed)
+        if not context.pages:
+            await context.new_page()
 
         print("\n" + "=" * 60)
         print("✓ Browser is running!")
@@ -89,12 +85,13 @@ async def main():
         print("\nPress Ctrl+C to stop the browser")
         print("=" * 60)
 
-        # Keep browser running until interrupted
-        try:
-            while not shutdown_flag:
-                await asyncio.sleep(1)
-        except KeyboardInterrupt:
-            pass
+        # Keep browser running until Ctrl+C / SIGTERM (sleeps without waking up)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGINT, stop.set)
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+        await stop.wait()
+        print("\n\nShutdown signal received. Closing browser...")
 
         print("\nClosing browser...")
         await context.close()
@@ -103,10 +100,6 @@ async def main():
     return 0
 
 if __name__ == "__main__":
-    # Set up signal handler for graceful shutdown
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-
     try:
         exit_code = asyncio.run(main())
         sys.exit(exit_code)
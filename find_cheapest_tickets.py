@@ -4,56 +4,315 @@ Script to find the cheapest combination of train tickets for a journey.
 Compares buying a single direct ticket vs. buying multiple segment tickets.
 """
 
+import argparse
 import csv
+import functools
+import glob
+import hashlib
+import io
+import itertools
+import os
 import sys
-from typing import List, Tuple, Optional
+import traceback
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 
+import numpy as np
 
-def parse_tsv_file(filepath: str) -> Tuple[List[str], List[str], List[List[Optional[float]]]]:
+try:
+    # Kernels compiled ahead of time by build_aot.py (optional)
+    import dp_kernels
+except ImportError:
+    dp_kernels = None
+
+# Cell values that mark a ticket as unavailable
+UNAVAILABLE_MARKERS = ('', '?', '0')
+
+# Parsed TSV files are cached here as .npz (see load_tsv_file)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# Bump whenever parse_tsv_file changes what it accepts or returns, so older cache entries are ignored
+CACHE_VERSION = 2
+
+# Loading an .npz costs ~0.25ms, which only beats parsing from about 30 stations (~4 KB) on
+CACHE_MIN_BYTES = 4096
+
+
+def parse_tsv_file(filepath: str) -> Tuple[List[str], List[str], np.ndarray]:
     """
     Parse a TSV file containing train ticket prices.
 
     Returns:
         - stations: List of station names
         - times: List of arrival times at each station
-        - prices: 2D matrix where prices[i][j] = price from station i to station j
+        - prices: 2D float64 array where prices[i, j] = price from station i to station j
+          (np.inf if no ticket is available)
     """
     with open(filepath, 'r', encoding='utf-8') as f:
         reader = csv.reader(f, delimiter='\t')
-        rows = list(reader)
 
-    # Extract times from first row (skip first 2 columns which contain metadata)
-    times = [cell.strip() for cell in rows[0][2:] if cell.strip()]
+        # Extract times from first row (skip first 2 columns which contain metadata)
+        times = [cell.strip() for cell in next(reader, [])[2:] if cell.strip()]
+
+        # Extract station names from second row (skip first 2 columns)
+        stations = [cell.strip() for cell in next(reader, [])[2:] if cell.strip()]
+
+        # Stream the n price rows (columns 2+), right-padding short rows with
+        # empty cells once so the block can be built without bounds checks
+        n = len(stations)
+        rows = [cells + [''] * (n - len(cells))
+                for cells in (row[2:2 + n] for row in itertools.islice(reader, n))]
+
+    # Missing trailing rows are empty as well
+    rows += [[''] * n] * (n - len(rows))
+
+    # Convert the whole block at once instead of cell by cell.
+    # Only the upper triangle (including the diagonal) holds prices;
+    # "?", "0", empty and non-numeric cells mean the ticket is unavailable.
+    block = np.char.strip(np.array(rows, dtype=str).reshape(n, n))
+    available = np.triu(~np.isin(block, UNAVAILABLE_MARKERS))
+
+    # Column-major, so each DP column scan prices[:i, i] is contiguous
+    # (and prices.T is a C-contiguous view, see find_cheapest_route)
+    prices = np.full((n, n), np.inf, dtype=np.float64, order='F')
+    if not available.any():
+        # np.char.replace cannot handle an empty array
+        return stations, times, prices
+
+    # Handle German decimal format (comma as decimal separator)
+    values = np.char.replace(block[available], ',', '.')
+
+    # A price is digits with at most one decimal point ("17", "17.4", "17.").
+    # Validating with string ufuncs keeps the loop in NumPy and the conversion
+    # below can never raise.
+    is_price = (np.char.isdecimal(np.char.replace(values, '.', '', count=1))
+                & ~np.char.startswith(values, '.'))
+    available[available] = is_price
+    prices[available] = values[is_price].astype(np.float64)
 
-    # Extract station names from second row (skip first 2 columns)
-    stations = [cell.strip() for cell in rows[1][2:] if cell.strip()]
+    return stations, times, prices
 
-    # Build price matrix
-    n = len(stations)
-    prices = [[None for _ in range(n)] for _ in range(n)]
-
-    # Parse price rows (starting from row 2, which is index 2)
-    for i in range(n):
-        if i + 2 < len(rows):
-            row = rows[i + 2]
-            # Skip first 2 columns (time and station name)
-            # Then skip i columns (the diagonal and stations before)
-            for j in range(i, n):
-                col_idx = 2 + j
-                if col_idx < len(row):
-                    price_str = row[col_idx].strip()
-                    if price_str and price_str != '?' and price_str != '0':
-                        try:
-                            # Handle German decimal format (comma as decimal separator)
-                            price_str = price_str.replace(',', '.')
-                            prices[i][j] = float(price_str)
-                        except ValueError:
-                            prices[i][j] = None
+
+def _cache_key(filepath: str) -> str:
+    """Cache key prefix for a TSV file (hash of its absolute path)."""
+    return hashlib.sha1(os.path.abspath(filepath).encode('utf-8')).hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_tsv_file(filepath: str, mtime_ns: int, size: int) -> Tuple[List[str], List[str], np.ndarray]:
+    """Load a parsed TSV file from the on-disk cache, parsing and caching it on a miss."""
+    if size < CACHE_MIN_BYTES:
+        return parse_tsv_file(filepath)
+
+    key = _cache_key(filepath)
+    cache_file = os.path.join(CACHE_DIR, f"{key}.v{CACHE_VERSION}.{mtime_ns}.{size}.npz")
+
+    try:
+        with np.load(cache_file) as data:
+            return data['stations'].tolist(), data['times'].tolist(), data['prices']
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        pass
+
+    stations, times, prices = parse_tsv_file(filepath)
+
+    # Caching is best effort - a read-only checkout still works
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Drop entries for older versions of this file (or of the cache format)
+        for stale_file in glob.glob(os.path.join(CACHE_DIR, f"{key}.*.npz")):
+            os.remove(stale_file)
+        tmp_file = cache_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            np.savez_compressed(f, stations=np.array(stations, dtype=str),
+                                times=np.array(times, dtype=str), prices=prices)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
 
     return stations, times, prices
 
 
-def find_cheapest_route(stations: List[str], prices: List[List[Optional[float]]]) -> Tuple[float, List[Tuple[int, int]]]:
+def load_tsv_file(filepath: str) -> Tuple[List[str], List[str], np.ndarray]:
+    """
+    Same as parse_tsv_file, but reuses the previous result if the file is unchanged.
+
+    Results are cached on disk in CACHE_DIR (keyed by path, mtime, size and
+    CACHE_VERSION; only for files of at least CACHE_MIN_BYTES, smaller ones
+    parse faster than the cache loads) and in memory for repeated files
+    within one run.
+    """
+    stat = os.stat(filepath)
+    return _load_tsv_file(filepath, stat.st_mtime_ns, stat.st_size)
+
+
+def _dp_kernel_numpy(prices_t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run the DP over a transposed price matrix (prices_t[i, j] = price from j to i).
+
+    Returns:
+        - dp: dp[i] = minimum cost to reach station i from station 0
+        - prev: prev[i] = previous station index in the optimal path (-1 if none)
+    """
+    n = prices_t.shape[0]
+    dp = np.full(n, np.inf)
+    dp[0] = 0.0
+    prev = np.full(n, -1, dtype=np.int64)
+
+    # For each station, evaluate all previous stations at once
+    # (unavailable tickets are np.inf, so they never win the argmin)
+    for i in range(1, n):
+        cost = dp[:i] + prices_t[i, :i]
+        k = int(cost.argmin())
+        dp[i] = cost[k]
+        prev[i] = k
+
+    # Unreachable stations have no predecessor
+    prev[np.isinf(dp)] = -1
+
+    return dp, prev
+
+
+def _batch_dp_kernel_numpy(prices_t_batch: np.ndarray, dp_kernel=_dp_kernel_numpy) -> Tuple[np.ndarray, np.ndarray]:
+    """Run dp_kernel on each matrix of a (num_files, n, n) stack, returning stacked dp/prev."""
+    results = [dp_kernel(prices_t) for prices_t in prices_t_batch]
+    return np.array([dp for dp, _ in results]), np.array([prev for _, prev in results])
+
+
+# Total input size from which main loads files in a process pool (parsing runs at ~5 MB/s,
+# so below this the pool startup costs more than it saves)
+POOL_MIN_BYTES = 1 << 20
+
+# Station rows (files x stations) from which the DP uses numba: importing numba and loading
+# the cached kernels takes ~0.4s, the compiled kernel saves ~1us per station row over NumPy
+JIT_MIN_ROWS = 400_000
+
+# Station count from which _dp_kernel_loops prunes with branch-and-bound (measured break-even ~60-80)
+PRUNE_MIN_STATIONS = 64
+
+# Signatures of the compiled kernels (JIT below and AOT in build_aot.py)
+DP_KERNEL_SIGNATURE = 'Tuple((float64[::1], int64[::1]))(float64[:, ::1])'
+PATH_NODES_SIGNATURE = 'int64[::1](int64[::1], int64)'
+
+
+def _dp_kernel_loops(prices_t):
+    """
+    Scalar-loop version of _dp_kernel_numpy, compiled with numba (JIT or build_aot.py).
+
+    From PRUNE_MIN_STATIONS stations on, uses branch-and-bound: the direct ticket
+    from station 0 is the initial upper bound for each station, and a previous
+    station j is skipped when even its cheapest onward ticket cannot beat the
+    current best. Below that, the extra pass computing row_min costs more than
+    the skipped comparisons save.
+    """
+    n = prices_t.shape[0]
+    prune = n >= PRUNE_MIN_STATIONS
+
+    # row_min[j] = cheapest ticket from station j to any later station
+    row_min = np.full(n, np.inf)
+    if prune:
+        for i in range(1, n):
+            for j in range(i):
+                row_min[j] = min(row_min[j], prices_t[i, j])
+
+    dp = np.full(n, np.inf)
+    dp[0] = 0.0
+    prev = np.full(n, -1, dtype=np.int64)
+
+    for i in range(1, n):
+        best = prices_t[i, 0]
+        best_j = 0 if best < np.inf else -1
+        for j in range(1, i):
+            # dp[j] + prices_t[i, j] >= dp[j] + row_min[j], so j cannot improve on best
+            if prune and dp[j] + row_min[j] >= best:
+                continue
+            cost = dp[j] + prices_t[i, j]
+            if cost < best:
+                best = cost
+                best_j = j
+        dp[i] = best
+        prev[i] = best_j
+
+    return dp, prev
+
+
+def _path_nodes_loops(prev: np.ndarray, last: int) -> np.ndarray:
+    """Station indices on the optimal path to `last`, in travel order (filled from the tail)."""
+    nodes = np.empty(prev.shape[0], dtype=np.int64)
+    k = prev.shape[0]
+    current = last
+    while current != -1:
+        k -= 1
+        nodes[k] = current
+        current = prev[current]
+    return nodes[k:]
+
+
+@functools.lru_cache(maxsize=None)
+def _jit_kernels():
+    """
+    Compile the scalar kernels with numba (loaded from numba's cache after the first run).
+
+    Returns (dp_kernel, batch_dp_kernel, path_nodes), or None if numba is not installed.
+    Only called from the DP, after main() has closed its process pool: loading the
+    parallel threading layer (e.g. TBB) before forking can hang the interpreter at exit.
+    """
+    try:
+        import numba
+    except ImportError:  # numba is optional, the DP falls back to plain NumPy
+        return None
+
+    dp_kernel = numba.njit(DP_KERNEL_SIGNATURE, cache=True)(_dp_kernel_loops)
+    path_nodes = numba.njit(PATH_NODES_SIGNATURE, cache=True)(_path_nodes_loops)
+
+    @numba.njit(parallel=True, cache=True)
+    def batch_dp_kernel(prices_t_batch):
+        """Compiled version of _batch_dp_kernel_numpy, one thread per matrix (prange)."""
+        num_files = prices_t_batch.shape[0]
+        n = prices_t_batch.shape[1]
+        dp = np.empty((num_files, n))
+        prev = np.empty((num_files, n), dtype=np.int64)
+
+        for f in numba.prange(num_files):
+            dp_f, prev_f = dp_kernel(prices_t_batch[f])
+            dp[f] = dp_f
+            prev[f] = prev_f
+
+        return dp, prev
+
+    return dp_kernel, batch_dp_kernel, path_nodes
+
+
+def _kernels(rows: int):
+    """
+    Pick (dp_kernel, batch_dp_kernel, path_nodes) for a DP over `rows` station rows in total.
+
+    In order of preference: the AOT module from build_aot.py, numba JIT for
+    batches of at least JIT_MIN_ROWS, and the vectorized NumPy kernels.
+    """
+    if dp_kernels is not None:
+        return (dp_kernels.dp_kernel,
+                functools.partial(_batch_dp_kernel_numpy, dp_kernel=dp_kernels.dp_kernel),
+                dp_kernels.path_nodes)
+    if rows >= JIT_MIN_ROWS:
+        jit_kernels = _jit_kernels()
+        if jit_kernels is not None:
+            return jit_kernels
+    return _dp_kernel_numpy, _batch_dp_kernel_numpy, _path_nodes_loops
+
+
+def _reconstruct_path(dp: np.ndarray, prev: np.ndarray, last: int, path_nodes) -> Tuple[float, List[Tuple[int, int]]]:
+    """Backtrack through the DP results to get (min_cost, path) for reaching station `last`."""
+    if np.isinf(dp[last]):
+        return np.inf, []
+
+    nodes = path_nodes(prev, last)
+    path = [(int(from_idx), int(to_idx)) for from_idx, to_idx in zip(nodes[:-1], nodes[1:])]
+
+    return float(dp[last]), path
+
+
+def find_cheapest_route(stations: List[str], prices: np.ndarray) -> Tuple[float, List[Tuple[int, int]]]:
     """
     Find the cheapest combination of tickets from first to last station.
 
@@ -65,106 +324,180 @@ def find_cheapest_route(stations: List[str], prices: List[List[Optional[float]]]
     """
     n = len(stations)
 
-    # dp[i] = (min_cost_to_reach_i, previous_station_index)
-    dp = [float('inf')] * n
-    dp[0] = 0
-    prev = [-1] * n
+    # The DP scans prices[:i, i] (a column), so hand the kernel the transpose
+    # in C order to make that scan a contiguous row. For the column-major
+    # matrices from parse_tsv_file this is a view, not a copy.
+    prices_t = np.ascontiguousarray(prices.T)
+    dp_kernel, _, path_nodes = _kernels(n)
+    dp, prev = dp_kernel(prices_t)
+
+    return _reconstruct_path(dp, prev, n - 1, path_nodes)
 
-    # Dynamic programming: for each station, try all possible previous stations
-    for i in range(1, n):
-        for j in range(i):
-            if prices[j][i] is not None and dp[j] != float('inf'):
-                cost = dp[j] + prices[j][i]
-                if cost < dp[i]:
-                    dp[i] = cost
-                    prev[i] = j
-
-    # Reconstruct the path
-    if dp[n-1] == float('inf'):
-        return float('inf'), []
-
-    path = []
-    current = n - 1
-    while prev[current] != -1:
-        path.append((prev[current], current))
-        current = prev[current]
 
-    path.reverse()
+def find_cheapest_routes(price_matrices: List[np.ndarray]) -> List[Tuple[float, List[Tuple[int, int]]]]:
+    """
+    Same as find_cheapest_route for several price matrices, in one batched DP call.
+
+    The transposed matrices are stacked and padded with np.inf to a common size.
+    Padded stations come after the real ones and cannot be reached, so they do
+    not change the result for the real last station.
+    """
+    if not price_matrices:
+        return []
+
+    sizes = [prices.shape[0] for prices in price_matrices]
+    n_max = max(1, *sizes)
+    prices_t_batch = np.full((len(price_matrices), n_max, n_max), np.inf)
+    for f, prices in enumerate(price_matrices):
+        prices_t_batch[f, :sizes[f], :sizes[f]] = prices.T
+
+    _, batch_dp_kernel, path_nodes = _kernels(len(price_matrices) * n_max)
+    dp, prev = batch_dp_kernel(prices_t_batch)
+
+    return [_reconstruct_path(dp[f], prev[f], n - 1, path_nodes) for f, n in enumerate(sizes)]
 
-    return dp[n-1], path
 
+def find_cheapest_route_dijkstra(stations: List[str], prices: np.ndarray) -> Tuple[float, List[Tuple[int, int]]]:
+    """
+    Same as find_cheapest_route, using SciPy's compiled Dijkstra (requires scipy).
+
+    Every available forward ticket (i < j) becomes an edge of a sparse graph.
+    Slower than the DP for timetable-sized inputs; kept for comparison (--solver dijkstra).
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+
+    n = len(stations)
+    rows, cols = np.nonzero(np.triu(np.isfinite(prices), k=1))
+    graph = csr_matrix((prices[rows, cols], (rows, cols)), shape=(n, n))
+    dist, pred = dijkstra(graph, indices=0, return_predecessors=True)
+
+    # SciPy returns int32 predecessors and marks "no predecessor" with -9999
+    pred = np.where(pred < 0, -1, pred).astype(np.int64)
+    _, _, path_nodes = _kernels(n)
 
+    return _reconstruct_path(dist, pred, n - 1, path_nodes)
+
+
+@functools.lru_cache(maxsize=4096)
 def format_price(price: float) -> str:
     """Format price with German decimal separator."""
     return f"{price:.2f}".replace('.', ',')
 
 
-def analyze_tickets(filepath: str):
-    """Analyze a ticket file and print results."""
-    print(f"\n{'='*80}")
-    print(f"Analyzing: {filepath}")
-    print(f"{'='*80}\n")
-
-    stations, times, prices = parse_tsv_file(filepath)
+def format_report(filepath: str, stations: List[str], prices: np.ndarray,
+                  min_cost: float, path: List[Tuple[int, int]]) -> str:
+    """Format the analysis of one ticket file (direct price vs. cheapest combination)."""
+    out = io.StringIO()
+    print(f"\n{'='*80}", file=out)
+    print(f"Analyzing: {filepath}", file=out)
+    print(f"{'='*80}\n", file=out)
 
-    print(f"Route: {stations[0]} → {stations[-1]}")
-    print(f"Number of stations: {len(stations)}")
-    print(f"\nStations: {' → '.join(stations)}\n")
+    print(f"Route: {stations[0]} → {stations[-1]}", file=out)
+    print(f"Number of stations: {len(stations)}", file=out)
+    print(f"\nStations: {' → '.join(stations)}\n", file=out)
 
     # Get direct ticket price
-    direct_price = prices[0][-1]
+    direct_price = float(prices[0, -1])
 
-    if direct_price is None:
-        print("⚠️  No direct ticket available from start to end!")
-        direct_price = float('inf')
+    if np.isinf(direct_price):
+        print("⚠️  No direct ticket available from start to end!", file=out)
     else:
-        print(f"Direct ticket price: {format_price(direct_price)} EUR")
-
-    # Find cheapest combination
-    min_cost, path = find_cheapest_route(stations, prices)
+        print(f"Direct ticket price: {format_price(direct_price)} EUR", file=out)
 
-    if min_cost == float('inf'):
-        print("\n❌ No valid route found!")
-        return
+    if np.isinf(min_cost):
+        print("\n❌ No valid route found!", file=out)
+        return out.getvalue()
 
-    print(f"Cheapest combination: {format_price(min_cost)} EUR")
+    print(f"Cheapest combination: {format_price(min_cost)} EUR", file=out)
 
     # Calculate savings
-    if direct_price != float('inf'):
+    if not np.isinf(direct_price):
         savings = direct_price - min_cost
         savings_percent = (savings / direct_price) * 100
 
-        print(f"\n{'='*80}")
+        print(f"\n{'='*80}", file=out)
         if savings > 0.01:  # Account for floating point precision
-            print(f"💰 SAVINGS: {format_price(savings)} EUR ({savings_percent:.1f}%)")
+            print(f"💰 SAVINGS: {format_price(savings)} EUR ({savings_percent:.1f}%)", file=out)
         elif savings < -0.01:
-            print(f"⚠️  Warning: Combination is more expensive by {format_price(-savings)} EUR")
+            print(f"⚠️  Warning: Combination is more expensive by {format_price(-savings)} EUR", file=out)
         else:
-            print(f"ℹ️  Same price as direct ticket")
-        print(f"{'='*80}\n")
+            print(f"ℹ️  Same price as direct ticket", file=out)
+        print(f"{'='*80}\n", file=out)
 
     # Show ticket breakdown
     if len(path) > 1 or (len(path) == 1 and path[0][0] != 0 or path[0][1] != len(stations) - 1):
-        print("Tickets to buy:")
+        print("Tickets to buy:", file=out)
         for i, (from_idx, to_idx) in enumerate(path, 1):
-            price = prices[from_idx][to_idx]
-            print(f"  {i}. {stations[from_idx]} → {stations[to_idx]}: {format_price(price)} EUR")
+            price = prices[from_idx, to_idx]
+            print(f"  {i}. {stations[from_idx]} → {stations[to_idx]}: {format_price(price)} EUR", file=out)
     else:
-        print("Buy a single direct ticket (no savings from splitting)")
+        print("Buy a single direct ticket (no savings from splitting)", file=out)
+
+    return out.getvalue()
+
+
+def _load_file(filepath: str) -> Tuple[Optional[Tuple[List[str], List[str], np.ndarray]], Optional[Tuple[str, str]]]:
+    """Run load_tsv_file, returning (data, None) or (None, (message, traceback)) instead of raising."""
+    try:
+        return load_tsv_file(filepath), None
+    except Exception as e:
+        return None, (f"\n❌ Error processing {filepath}: {e}", traceback.format_exc())
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python find_cheapest_tickets.py <tsv_file> [<tsv_file2> ...]")
-        print("\nExample: python find_cheapest_tickets.py data/*.tsv")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='Find the cheapest combination of train tickets for a journey',
+        epilog='Example: python find_cheapest_tickets.py data/*.tsv'
+    )
+    parser.add_argument('tsv_files', nargs='+', metavar='tsv_file',
+                        help='TSV price matrix file(s) to analyze')
+    parser.add_argument('--solver', choices=['dp', 'dijkstra'], default='dp',
+                        help='Shortest-path solver: dynamic programming (default, fastest) '
+                             'or SciPy Dijkstra (requires scipy)')
+
+    args = parser.parse_args()
+
+    if args.solver == 'dijkstra':
+        try:
+            import scipy  # noqa: F401
+        except ImportError:
+            parser.error("--solver dijkstra requires scipy (pip install scipy)")
+
+    filepaths = args.tsv_files
+
+    # Files are independent, so large inputs are loaded in parallel worker processes.
+    # Starting the pool costs ~100ms, more than loading typical inputs in-process.
+    try:
+        total_bytes = sum(os.path.getsize(filepath) for filepath in filepaths)
+    except OSError:
+        total_bytes = 0  # Missing files are reported per file by _load_file
+    if len(filepaths) > 1 and (os.cpu_count() or 1) > 1 and total_bytes >= POOL_MIN_BYTES:
+        with ProcessPoolExecutor(max_workers=min(len(filepaths), os.cpu_count() or 1)) as executor:
+            loaded = list(executor.map(_load_file, filepaths))
+    else:
+        loaded = [_load_file(filepath) for filepath in filepaths]
 
-    for filepath in sys.argv[1:]:
+    valid = [data for data, _ in loaded if data is not None]
+    if args.solver == 'dijkstra':
+        routes = iter([find_cheapest_route_dijkstra(stations, prices) for stations, _, prices in valid])
+    else:
+        # Run the DP for all loaded files in one batched call instead of once per file
+        routes = iter(find_cheapest_routes([prices for _, _, prices in valid]))
+
+    for filepath, (data, error) in zip(filepaths, loaded):
+        if data is None:
+            message, error_traceback = error
+            print(message)
+            print(error_traceback, end='', file=sys.stderr)
+            continue
+
+        stations, times, prices = data
+        min_cost, path = next(routes)
         try:
-            analyze_tickets(filepath)
+            print(format_report(filepath, stations, prices, min_cost, path), end='')
         except Exception as e:
             print(f"\n❌ Error processing {filepath}: {e}")
-            import traceback
             traceback.print_exc()
 
     print()
@@ -7,14 +7,20 @@ Creates a TSV file with a price matrix for all station segments on a route.
 import argparse
 import asyncio
 import csv
+import functools
 import logging
+import math
 import os
 import re
+import sqlite3
 import sys
+import time
+from contextlib import closing
 from datetime import datetime
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
-from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeout
+import numpy as np
+from playwright.async_api import async_playwright, Page, Error as PlaywrightError, TimeoutError as PlaywrightTimeout
 
 # Setup logging to file
 logging.basicConfig(
@@ -30,6 +36,251 @@ def log(msg):
     print(msg, flush=True)
 
 
+# Seconds after which a single segment query is abandoned and its price marked unknown
+SEGMENT_TIMEOUT = 30
+
+
+# Patterns used on every query
+_RE_DETAILS = re.compile(r'Details|öffne Details', re.IGNORECASE)  # "Details" buttons of result cards
+_RE_PRICE = re.compile(r'(\d+),(\d+)')  # Euro and cent of a price like "ab 79,99 €"
+_RE_UNSAFE = re.compile(r'[^\w\-]')  # Characters replaced in generated file names
+
+
+# Segment prices already fetched from bahn.de (see disk_cache)
+PRICE_CACHE_FILE = 'cache/prices.sqlite'
+
+
+# Results of get_ticket_price in this run, keyed by normalized segment (including misses)
+_memo: Dict[tuple, Optional[float]] = {}
+
+
+def disk_cache(ttl: int = 3600, path: str = PRICE_CACHE_FILE):
+    """Cache the results of an async price lookup in SQLite.
+
+    Entries are keyed by (origin, destination, date, time, train ID) and reused
+    for `ttl` seconds, so repeated or interrupted runs skip segments that were
+    already queried. Only found prices are cached - a missing price may be a
+    temporary failure and is queried again. The TTL can be changed at runtime
+    via the wrapper's `ttl` attribute (0 disables the cache).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(page: Page, origin: str, destination: str, departure_time: str,
+                          departure_date: str = None, expected_train_id: str = None) -> Optional[float]:
+            if wrapper.ttl <= 0:
+                return await func(page, origin, destination, departure_time, departure_date, expected_train_id)
+
+            key = (origin, destination, departure_date or '', departure_time, expected_train_id or '')
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with closing(sqlite3.connect(path)) as conn:
+                conn.execute('''CREATE TABLE IF NOT EXISTS prices (
+                    origin TEXT, destination TEXT, date TEXT, time TEXT, train_id TEXT,
+                    price REAL, fetched_at REAL,
+                    PRIMARY KEY (origin, destination, date, time, train_id))''')
+                row = conn.execute(
+                    'SELECT price, fetched_at FROM prices WHERE origin=? AND destination=? AND date=? AND time=? AND train_id=?',
+                    key
+                ).fetchone()
+
+            if row and time.time() - row[1] < wrapper.ttl:
+                log(f"    Cached price: {row[0]} EUR")
+                return row[0]
+
+            price = await func(page, origin, destination, departure_time, departure_date, expected_train_id)
+
+            if price is not None:
+                with closing(sqlite3.connect(path)) as conn, conn:
+                    conn.execute('INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                 key + (price, time.time()))
+            return price
+
+        wrapper.ttl = ttl
+        return wrapper
+    return decorator
+
+
+# Parses the opened Details panel into {trainNumber, dateStr, segments} in one round-trip,
+# with segments = [{trainId, stations, times}, ...] per train segment.
+_EXTRACT_JS = '''() => {
+    const segments = [];
+
+    // Find all train segments (.verbindungs-abschnitt)
+    const abschnitte = document.querySelectorAll('.verbindungs-abschnitt');
+
+    abschnitte.forEach((abschnitt, segmentIndex) => {
+        const segment = {
+            trainId: null,
+            stations: [],
+            times: []
+        };
+
+        // Get train ID for this segment from ri-transport-chip element
+        const trainChip = abschnitt.querySelector('ri-transport-chip');
+        if (trainChip) {
+            segment.trainId = trainChip.getAttribute('transport-text');
+        }
+
+        // Get all halts in this segment
+        const halts = abschnitt.querySelectorAll('.verbindungs-halt');
+
+        // Origin (first halt)
+        if (halts.length > 0) {
+            const originLink = halts[0].querySelector('a[href*="bahnhof.de"]');
+            const originTime = halts[0].querySelector('time');
+            if (originLink && originTime) {
+                segment.stations.push(originLink.textContent.trim());
+                segment.times.push(originTime.textContent.trim());
+            }
+        }
+
+        // Intermediate stops in this segment
+        const zwischenhalte = abschnitt.querySelectorAll('.verbindungs-zwischenhalte__zwischenhalt-container');
+        zwischenhalte.forEach(container => {
+            const name = container.querySelector('.verbindungs-zwischenhalt__name')?.textContent.trim();
+            const departureTime = container.querySelector('.verbindungs-zwischenhalt__abfahrts-zeit time')?.textContent.trim();
+
+            if (name && departureTime) {
+                segment.stations.push(name);
+                segment.times.push(departureTime);
+            }
+        });
+
+        // Destination (last halt) - only add if it's different from last added station
+        if (halts.length > 1) {
+            const destLink = halts[halts.length - 1].querySelector('a[href*="bahnhof.de"]');
+            const destTime = halts[halts.length - 1].querySelector('time');
+            if (destLink && destTime) {
+                const destStation = destLink.textContent.trim();
+                const destTimeStr = destTime.textContent.trim();
+                // Add destination
+                segment.stations.push(destStation);
+                segment.times.push(destTimeStr);
+            }
+        }
+
+        if (segment.stations.length > 0) {
+            segments.push(segment);
+        }
+    });
+
+    // Train number of the first connection (fallback for segments without their own train chip)
+    const trainEl = document.querySelector('.verbindung-list__result-item--0 .verbindungsabschnitt-visualisierung__verkehrsmittel-text');
+    const trainNumber = trainEl?.textContent.trim() || 'Unknown';
+
+    // Travel date (e.g. "Mo. 24. Nov. 2025"): element holding the first text node in that format
+    const datePattern = /\\w+\\.\\s+\\d+\\.\\s+\\w+\\.\\s+\\d+/;
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+    let dateStr = 'Unknown';
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        if (datePattern.test(node.textContent)) {
+            dateStr = node.parentElement.textContent.trim();
+            break;
+        }
+    }
+
+    return {trainNumber, dateStr, segments};
+}'''
+
+
+# First card of the connection result list
+FIRST_RESULT_SELECTOR = '.verbindung-list__result-item--0'
+
+# True once the given first result card was removed or re-rendered with new content
+_RESULTS_REPLACED_JS = f'''([previous, previousText]) =>
+    !previous.isConnected
+    || document.querySelector('{FIRST_RESULT_SELECTOR}') !== previous
+    || previous.innerText !== previousText'''
+
+# Train ID and price text of the first 5 connection results, in one evaluate call.
+# Missing cards are left out, missing fields are null.
+_SCAN_RESULTS_JS = '''() => [0, 1, 2, 3, 4].map(idx => {
+    const card = document.querySelector(`.verbindung-list__result-item--${idx}`);
+    if (!card) return null;
+    return {
+        idx,
+        trainId: card.querySelector('.verbindungsabschnitt-visualisierung__verkehrsmittel-text')?.textContent.trim() ?? null,
+        price: card.innerText.match(/\\d+,\\d+\\s*€/)?.[0] ?? null
+    };
+}).filter(card => card !== null)'''
+
+
+# Delays between attempts to reach the CDP endpoint, e.g. while debug_browser.py is still starting
+CDP_CONNECT_BACKOFF_MS = (50, 100, 200, 400, 800, 1500, 3000)
+
+
+async def connect_cdp(playwright, endpoint: str = "http://localhost:9222"):
+    """Connect to a running browser over CDP, retrying with exponential backoff.
+
+    Raises the last connection error if the browser is still unreachable
+    after all retries (about 6s in total).
+    """
+    for delay in CDP_CONNECT_BACKOFF_MS:
+        try:
+            return await playwright.chromium.connect_over_cdp(endpoint)
+        except Exception as e:
+            log(f"  Browser not reachable yet ({type(e).__name__}), retrying in {delay}ms...")
+            await asyncio.sleep(delay / 1000)
+    return await playwright.chromium.connect_over_cdp(endpoint)
+
+
+# Requests the scraper never needs: aborted to cut page weight and network-idle time.
+# Stylesheets are kept since visibility checks depend on the layout.
+BLOCKED_EXTENSIONS = ("png", "jpg", "jpeg", "gif", "webp", "avif", "ico", "woff", "woff2", "ttf", "otf", "mp4", "webm")
+BLOCKED_HOSTS = ("google-analytics", "googletagmanager", "doubleclick", "adobedtm", "optimizely")
+# URL patterns for CDP Network.setBlockedURLs (* matches any characters)
+BLOCKED_URL_PATTERNS = ([f"*.{ext}" for ext in BLOCKED_EXTENSIONS] + [f"*.{ext}?*" for ext in BLOCKED_EXTENSIONS]
+                        + [f"*{host}*" for host in BLOCKED_HOSTS])
+
+
+async def new_worker_page(context) -> Page:
+    """Open a tab for segment queries that skips images, fonts, media and third-party analytics.
+
+    Blocks via CDP on this tab only, so the user's own tabs (with --connect) are left alone
+    and the HTTP cache keeps working (context.route would disable it).
+    """
+    worker_page = await context.new_page()
+    session = await context.new_cdp_session(worker_page)
+    await session.send("Network.enable")
+    await session.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    return worker_page
+
+
+async def poll_until(page: Page, fn, interval: int = 100, timeout: int = 5000) -> bool:
+    """Poll the async condition `fn()` every `interval` ms until it is truthy.
+
+    Used for DOM conditions that cannot be expressed as a single selector.
+    Returns False if the condition did not hold within `timeout` ms.
+    """
+    deadline = time.monotonic() + timeout / 1000
+    while True:
+        if await fn():
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        await page.wait_for_timeout(interval)
+
+
+async def suggestions_closed(field) -> bool:
+    """Check whether the autocomplete dropdown of a combobox is closed again."""
+    return await field.get_attribute('aria-expanded') != 'true'
+
+
+async def ensure_search_form(page: Page):
+    """Make sure the bahn.de search form is available, navigating to the homepage only if needed.
+
+    The results page of a previous search still contains the full search form
+    (start/destination fields and date/time button), so it can be reused
+    instead of reloading the homepage for every segment.
+    """
+    if page.url.startswith("https://www.bahn.de"):
+        start_field = page.get_by_role('combobox', name='Start').first
+        datetime_btn = page.locator('button:has-text("Hinfahrt ändern")').first
+        if await start_field.is_visible() and await datetime_btn.is_visible():
+            return
+
+    await page.goto("https://www.bahn.de", wait_until="domcontentloaded")
+
+
 async def search_connection(page: Page, origin: str, destination: str, departure_time: str, departure_date: str = None, first_search: bool = False) -> bool:
     """Search for a train connection on bahn.de using the search form."""
     log(f"\nSearching for connection: {origin} → {destination}")
@@ -38,22 +289,27 @@ async def search_connection(page: Page, origin: str, destination: str, departure
     if first_search:
         log("  First search - handling cookies...")
         await page.goto("https://www.bahn.de", wait_until="domcontentloaded")
-        await page.wait_for_timeout(2000)
 
         try:
             cookie_button = page.locator('button:has-text("Alle Cookies zulassen")').or_(
                 page.locator('button:has-text("Nur erforderliche Cookies zulassen")')
             )
-            if await cookie_button.count() > 0:
+
+            # The consent dialog is injected after the form is shown, so wait for the button
+            # itself (once per run; it never appears if consent was already given)
+            try:
+                await cookie_button.first.wait_for(state='visible', timeout=3000)
+            except PlaywrightTimeout:
+                log("  No cookie dialog shown")
+            else:
                 log("  Accepting cookies...")
                 await cookie_button.first.click()
-                await page.wait_for_timeout(1000)
+                await cookie_button.first.wait_for(state='hidden', timeout=5000)
         except Exception as e:
             pass
     else:
-        # For subsequent searches, just go to homepage
-        await page.goto("https://www.bahn.de", wait_until="domcontentloaded")
-        await page.wait_for_timeout(1000)
+        # For subsequent searches, reuse the form if it is already there
+        await ensure_search_form(page)
 
     # Wait for search form
     await page.wait_for_selector('role=combobox[name="Start"]', timeout=10000)
@@ -63,24 +319,30 @@ async def search_connection(page: Page, origin: str, destination: str, departure
     origin_field = page.get_by_role('combobox', name='Start')
     await origin_field.click()
     await origin_field.fill(origin)
-    await page.wait_for_timeout(1000)
+    try:
+        await page.wait_for_selector('[role=listbox] [role=option]', timeout=3000)
+    except PlaywrightTimeout:
+        log("  Note: no suggestions shown for origin")
 
     # Press Enter to select suggestion
     log("  Pressing Enter to select origin...")
     await origin_field.press('Enter')
-    await page.wait_for_timeout(500)
+    await poll_until(page, lambda: suggestions_closed(origin_field), timeout=3000)
 
     # Fill in destination
     log(f"  Filling destination field: {destination}")
     dest_field = page.get_by_role('combobox', name='Ziel')
     await dest_field.click()
     await dest_field.fill(destination)
-    await page.wait_for_timeout(1000)
+    try:
+        await page.wait_for_selector('[role=listbox] [role=option]', timeout=3000)
+    except PlaywrightTimeout:
+        log("  Note: no suggestions shown for destination")
 
     # Press Enter to select suggestion
     log("  Pressing Enter to select destination...")
     await dest_field.press('Enter')
-    await page.wait_for_timeout(1000)
+    await poll_until(page, lambda: suggestions_closed(dest_field), timeout=3000)
 
     # Set date and time if provided
     if departure_date or departure_time:
@@ -94,7 +356,6 @@ async def search_connection(page: Page, origin: str, destination: str, departure
             datetime_btn = page.locator('button:has-text("Hinfahrt ändern")').first
             log("  Clicking date/time button...")
             await datetime_btn.click(timeout=10000)
-            await page.wait_for_timeout(1000)
 
             # Wait for the dialog to open
             await page.wait_for_selector('dialog', state='visible', timeout=5000)
@@ -133,28 +394,43 @@ async def search_connection(page: Page, origin: str, destination: str, departure
 
             # Wait for the dialog to close
             await page.wait_for_selector('dialog', state='hidden', timeout=5000)
-            await page.wait_for_timeout(500)
 
             log(f"  Date/time set successfully")
         except Exception as e:
             log(f"  Warning: Could not set date/time: {e}")
 
+    # Remember the results of the previous search in this tab (the form is reused),
+    # so they are not mistaken for the results of this one
+    previous_result = await page.query_selector(FIRST_RESULT_SELECTOR)
+    previous_text = await previous_result.inner_text() if previous_result else None
+
     # Click search button
     search_btn = page.get_by_role('button', name='Suchen').first
     await search_btn.click()
 
-    # Wait for results to load
+    # Wait for results to load (bahn.de never reaches networkidle, so wait for the result list itself)
+    if previous_result:
+        # The old results are still on screen and would pass every check below,
+        # so a search that did not replace them counts as failed.
+        # Poll on a timer: the default requestAnimationFrame polling stalls in background tabs
+        try:
+            await page.wait_for_function(_RESULTS_REPLACED_JS, arg=[previous_result, previous_text],
+                                         polling=100, timeout=15000)
+        except PlaywrightTimeout:
+            log("  Previous results were not replaced after 15s, skipping this search")
+            return False
+        finally:
+            await previous_result.dispose()
+
     try:
-        await page.wait_for_load_state('networkidle', timeout=20000)
-        await page.wait_for_timeout(3000)
-    except Exception as e:
-        # If networkidle times out, that's okay - results might already be there
-        log(f"  Note: networkidle timeout (this is expected when reusing browser): {e}")
-        await page.wait_for_timeout(2000)
+        await page.wait_for_selector(FIRST_RESULT_SELECTOR, timeout=15000)
+    except PlaywrightTimeout:
+        log("  Note: no new results after 15s, checking what is there")
+        await page.wait_for_timeout(1000)
 
-    # Check for Details buttons (even if networkidle failed)
+    # Check for Details buttons (even if the wait failed)
     try:
-        connections = page.get_by_role('button', name=re.compile(r'Details|öffne Details', re.IGNORECASE))
+        connections = page.get_by_role('button', name=_RE_DETAILS)
         count = await connections.count()
 
         if count > 0:
@@ -181,7 +457,7 @@ async def extract_stops_from_connection(page: Page) -> Tuple[List[str], List[str
 
     # Click details on the first connection
     log("  Clicking Details button...")
-    details_btn = page.get_by_role('button', name=re.compile(r'Details', re.IGNORECASE)).first
+    details_btn = page.get_by_role('button', name=_RE_DETAILS).first
     await details_btn.wait_for(state='visible', timeout=5000)
 
     # Check if panel is already open
@@ -191,7 +467,6 @@ async def extract_stops_from_connection(page: Page) -> Tuple[List[str], List[str
     # Only click if not already expanded
     if is_expanded != 'true':
         await details_btn.scroll_into_view_if_needed()
-        await page.wait_for_timeout(200)
         await details_btn.click()
         # Wait for details content to appear instead of fixed 3000ms wait
         await page.wait_for_selector('.verbindungs-halt', timeout=5000)
@@ -204,6 +479,7 @@ async def extract_stops_from_connection(page: Page) -> Tuple[List[str], List[str
     # There may be multiple buttons if the connection has transfers
     try:
         expand_stops_btns = page.locator('button:has-text("Haltestellen")')
+        stop_containers = page.locator('.verbindungs-zwischenhalte__zwischenhalt-container')
         btn_count = await expand_stops_btns.count()
         log(f"  Found {btn_count} expand buttons for intermediate stops")
         if btn_count > 0:
@@ -213,104 +489,25 @@ async def extract_stops_from_connection(page: Page) -> Tuple[List[str], List[str
                     btn = expand_stops_btns.nth(i)
                     btn_text = await btn.text_content()
                     log(f"  Clicking expand button: {btn_text}")
+                    shown = await stop_containers.count()
                     await btn.click()
-                    await page.wait_for_timeout(200)
+
+                    async def stops_expanded():
+                        return await stop_containers.count() > shown
+                    await poll_until(page, stops_expanded, timeout=2000)
                 except Exception as e:
                     log(f"  Could not click expand button {i}: {e}")
     except Exception as e:
         log(f"  Could not expand stops: {e}")
 
-    # Extract train number and date
-    train_number = "Unknown"
-    date_str = "Unknown"
-
-    try:
-        # Try to find train number (e.g., "ICE 503") in the first connection
-        # Train numbers appear in spans with class verbindungsabschnitt-visualisierung__verkehrsmittel-text
-        train_elem = page.locator('.verbindung-list__result-item--0 .verbindungsabschnitt-visualisierung__verkehrsmittel-text').first
-        if await train_elem.count() > 0:
-            train_text = await train_elem.text_content()
-            train_number = train_text.strip()
-            log(f"  Extracted train number: {train_number}")
-    except Exception as e:
-        log(f"  Could not extract train number: {e}")
-
-    try:
-        # Extract date
-        date_elem = page.locator('text:text-matches("\\w+\\.\\s+\\d+\\.\\s+\\w+\\.\\s+\\d+")').first
-        if await date_elem.count() > 0:
-            date_text = await date_elem.text_content()
-            date_str = date_text.strip()
-    except:
-        pass
-
-    # Extract all stations, times, and per-segment train IDs using JavaScript
-    log("  Extracting stations, times, and train IDs per segment...")
-
-    segments_data = await page.evaluate('''() => {
-        const segments = [];
-
-        // Find all train segments (.verbindungs-abschnitt)
-        const abschnitte = document.querySelectorAll('.verbindungs-abschnitt');
-
-        abschnitte.forEach((abschnitt, segmentIndex) => {
-            const segment = {
-                trainId: null,
-                stations: [],
-                times: []
-            };
-
-            // Get train ID for this segment from ri-transport-chip element
-            const trainChip = abschnitt.querySelector('ri-transport-chip');
-            if (trainChip) {
-                segment.trainId = trainChip.getAttribute('transport-text');
-            }
-
-            // Get all halts in this segment
-            const halts = abschnitt.querySelectorAll('.verbindungs-halt');
-
-            // Origin (first halt)
-            if (halts.length > 0) {
-                const originLink = halts[0].querySelector('a[href*="bahnhof.de"]');
-                const originTime = halts[0].querySelector('time');
-                if (originLink && originTime) {
-                    segment.stations.push(originLink.textContent.trim());
-                    segment.times.push(originTime.textContent.trim());
-                }
-            }
-
-            // Intermediate stops in this segment
-            const zwischenhalte = abschnitt.querySelectorAll('.verbindungs-zwischenhalte__zwischenhalt-container');
-            zwischenhalte.forEach(container => {
-                const name = container.querySelector('.verbindungs-zwischenhalt__name')?.textContent.trim();
-                const departureTime = container.querySelector('.verbindungs-zwischenhalt__abfahrts-zeit time')?.textContent.trim();
-
-                if (name && departureTime) {
-                    segment.stations.push(name);
-                    segment.times.push(departureTime);
-                }
-            });
-
-            // Destination (last halt) - only add if it's different from last added station
-            if (halts.length > 1) {
-                const destLink = halts[halts.length - 1].querySelector('a[href*="bahnhof.de"]');
-                const destTime = halts[halts.length - 1].querySelector('time');
-                if (destLink && destTime) {
-                    const destStation = destLink.textContent.trim();
-                    const destTimeStr = destTime.textContent.trim();
-                    // Add destination
-                    segment.stations.push(destStation);
-                    segment.times.push(destTimeStr);
-                }
-            }
-
-            if (segment.stations.length > 0) {
-                segments.push(segment);
-            }
-        });
+    # Extract train number, date, stations, times, and per-segment train IDs using JavaScript
+    log("  Extracting train number, date, stations, times, and train IDs per segment...")
 
-        return segments;
-    }''')
+    data = await page.evaluate(_EXTRACT_JS)
+    train_number = data['trainNumber']
+    date_str = data['dateStr']
+    segments_data = data['segments']
+    log(f"  Extracted train number: {train_number} (date: {date_str})")
 
     # Flatten segments into single lists with train ID mapping
     stations = []
@@ -322,14 +519,14 @@ async def extract_stops_from_connection(page: Page) -> Tuple[List[str], List[str
         segment_stations = segment['stations']
         segment_times = segment['times']
 
-        for i, (station, time) in enumerate(zip(segment_stations, segment_times)):
+        for i, (station, station_time) in enumerate(zip(segment_stations, segment_times)):
             # Skip if this is the first station of a non-first segment and it's the same as the last added station
             # (destination of previous segment = origin of current segment)
             if stations and station == stations[-1]:
                 continue
 
             stations.append(station)
-            times.append(time)
+            times.append(station_time)
             train_ids.append(train_id)
 
     log(f"  Found {len(stations)} stations across {len(segments_data)} train segment(s)")
@@ -339,6 +536,7 @@ async def extract_stops_from_connection(page: Page) -> Tuple[List[str], List[str
     return stations, times, train_ids
 
 
+@disk_cache(ttl=3600)
 async def get_ticket_price(page: Page, origin: str, destination: str, departure_time: str, departure_date: str = None, expected_train_id: str = None) -> Optional[float]:
     """Get the ticket price for a specific route segment.
 
@@ -353,115 +551,198 @@ async def get_ticket_price(page: Page, origin: str, destination: str, departure_
     Returns:
         Price in EUR if found and train ID matches, None otherwise
     """
+    # Segments repeated within this run (also under different spelling) are only queried once
+    key = (origin.casefold().strip(), destination.casefold().strip(), departure_date, departure_time, expected_train_id)
+    if key in _memo:
+        log(f"  Price already queried in this run: {origin} → {destination}")
+        return _memo[key]
+
+    price = await lookup_ticket_price(page, origin, destination, departure_time, departure_date, expected_train_id)
+    _memo[key] = price
+    return price
+
+
+async def lookup_ticket_price(page: Page, origin: str, destination: str, departure_time: str, departure_date: str = None, expected_train_id: str = None) -> Optional[float]:
+    """Search bahn.de for a route segment and read the price of the expected train (see get_ticket_price)."""
     log(f"  Getting price: {origin} → {destination}")
 
     if not await search_connection(page, origin, destination, departure_time, departure_date, first_search=False):
         return None
 
+    # Read train ID and price of all result cards in one round-trip
+    try:
+        cards = await page.evaluate(_SCAN_RESULTS_JS)
+    except Exception as e:
+        log(f"    Error reading connection results: {e}")
+        return None
+
     # If expected_train_id is provided, search through all connections to find the matching train
-    connection_index = 0
+    card = cards[0] if cards and cards[0]['idx'] == 0 else None
     if expected_train_id and expected_train_id != "Unknown":
-        try:
-            # Search through all 5 connection results to find the one with matching train ID
-            found_match = False
-            for i in range(5):
-                train_elem = page.locator(f'.verbindung-list__result-item--{i} .verbindungsabschnitt-visualisierung__verkehrsmittel-text').first
-                if await train_elem.count() > 0:
-                    actual_train_id = await train_elem.text_content()
-                    actual_train_id = actual_train_id.strip()
-
-                    if actual_train_id == expected_train_id:
-                        log(f"    Train ID verified: {actual_train_id} (connection #{i+1})")
-                        connection_index = i
-                        found_match = True
-                        break
-                    elif i == 0:
-                        log(f"    First connection has {actual_train_id}, searching for {expected_train_id}...")
-
-            if not found_match:
-                log(f"    Train ID not found in any of the 5 connections! Expected: {expected_train_id}")
-                log(f"    Skipping - could not find matching connection")
-                return None
-        except Exception as e:
-            log(f"    Error verifying train ID: {e}")
+        card = next((c for c in cards if c['trainId'] == expected_train_id), None)
+        if card is None:
+            log(f"    Train ID not found in any of the 5 connections! Expected: {expected_train_id}")
+            log(f"    Skipping - could not find matching connection")
             return None
-
-    # Extract price from the matching connection
-    try:
-        # First get the connection element, then search for price within it
-        connection_elem = page.locator(f'.verbindung-list__result-item--{connection_index}').first
-        if await connection_elem.count() > 0:
-            # Look for price in format "ab XX,XX €" or just "XX,XX €"
-            price_element = connection_elem.locator('text=/\\d+,\\d+\\s*€/').first
-            if await price_element.count() > 0:
-                price_text = await price_element.text_content()
-                # Extract numeric value (format: "ab 79,99 €" or "79,99 €")
-                match = re.search(r'(\d+),(\d+)', price_text)
-                if match:
-                    price = float(f"{match.group(1)}.{match.group(2)}")
-                    log(f"    Found price: {price} EUR")
-                    return price
-    except Exception as e:
-        log(f"    Error extracting price: {e}")
+        if card['idx'] != 0 and cards[0]['idx'] == 0 and cards[0]['trainId']:
+            log(f"    First connection has {cards[0]['trainId']}, searching for {expected_train_id}...")
+        log(f"    Train ID verified: {card['trainId']} (connection #{card['idx'] + 1})")
+
+    # Extract price from the matching connection (format: "ab 79,99 €" or "79,99 €")
+    if card and card['price']:
+        match = _RE_PRICE.search(card['price'])
+        if match:
+            price = float(f"{match.group(1)}.{match.group(2)}")
+            log(f"    Found price: {price} EUR")
+            return price
 
     return None
 
 
+def segment_pairs(n: int, train_ids: List[str] = None, sparse: bool = False) -> List[Tuple[int, int]]:
+    """List the (i, j) station pairs with i < j whose price should be queried.
+
+    By default all pairs are queried. With `sparse`, the stations are split into
+    runs of consecutive stations served by the same train: pairs within a run
+    are still all queried, but across runs only every station of the earlier
+    run to the first station of each later run (so every station stays
+    reachable, the transfer station belongs to the earlier run), plus the
+    first station of the earlier run to the last station of the later run
+    (through tickets). Other cross-run segments involve a transfer and rarely
+    match the expected train anyway.
+    """
+    if not sparse or not train_ids:
+        return [(i, j) for i in range(n) for j in range(i + 1, n)]
+
+    # runs[k] = (first, last) station index of the k-th run of the same train
+    runs = []
+    for i, train_id in enumerate(train_ids):
+        if runs and train_ids[runs[-1][0]] == train_id:
+            runs[-1] = (runs[-1][0], i)
+        else:
+            runs.append((i, i))
+
+    pairs = []
+    for a, (first_a, last_a) in enumerate(runs):
+        pairs.extend((i, j) for i in range(first_a, last_a + 1) for j in range(i + 1, last_a + 1))
+        for first_b, last_b in runs[a + 1:]:
+            pairs.extend((i, first_b) for i in range(first_a, last_a + 1))
+            if last_b != first_b:
+                pairs.append((first_a, last_b))
+    return sorted(pairs)
+
+
 async def create_price_matrix(page: Page, stations: List[str], times: List[str],
-                               departure_time: str, departure_date: str = None, train_ids: List[str] = None) -> List[List[Optional[float]]]:
+                               departure_time: str, departure_date: str = None, train_ids: List[str] = None,
+                               workers: int = 1, sparse: bool = False) -> np.ndarray:
     """Create a price matrix for all station pairs.
 
+    The segment queries are independent, so they are distributed over several
+    tabs of the same browser context that query concurrently.
+
     Args:
-        page: Playwright page object
+        page: Playwright page object (used by the first worker, the others open their own tabs)
         stations: List of station names in order
         times: List of departure times for each station
         departure_time: Initial departure time
         departure_date: Departure date (DD.MM.YYYY format)
         train_ids: List of train IDs per station (train_ids[i] = train ID for station i)
+        workers: Number of tabs querying segments concurrently
+        sparse: Skip most segments across train changes (see segment_pairs)
 
     Returns:
-        Price matrix where prices[i][j] is the price from station i to station j
+        Price matrix (n x n float64) where prices[i, j] is the price from station i
+        to station j (NaN for segments that were not found or not queried)
     """
     n = len(stations)
-    prices = [[None for _ in range(n)] for _ in range(n)]
+    prices = np.full((n, n), np.nan)
 
     # Calculate total number of combinations to query
-    total_combinations = n * (n - 1) // 2
+    pairs = segment_pairs(n, train_ids, sparse)
+    total_combinations = len(pairs)
     current_combination = 0
 
     log(f"\nCreating price matrix for {n} stations...")
     log(f"  Total segment combinations to query: {total_combinations}")
+    if sparse:
+        log(f"  Sparse mode: skipping {n * (n - 1) // 2 - total_combinations} cross-train segment(s)")
     if train_ids:
         unique_trains = set(train_ids)
         log(f"  Connection uses {len(unique_trains)} train(s): {', '.join(sorted(unique_trains))}")
 
-    # Get prices for all combinations where i < j (only forward direction)
-    for i in range(n):
-        for j in range(i + 1, n):
-            current_combination += 1
-            # Use the departure time of the origin station (station i)
-            segment_departure_time = times[i]
-            # Use the train ID of the departure station (station i)
-            segment_train_id = train_ids[i] if train_ids else None
-            log(f"\n  [{current_combination}/{total_combinations}] Querying: {stations[i]} → {stations[j]} (dep. {segment_departure_time}, train: {segment_train_id})")
-            price = await get_ticket_price(page, stations[i], stations[j], segment_departure_time, departure_date, segment_train_id)
-            if price is not None:
-                log(f"    ✓ Price: €{price:.2f}")
-            else:
-                log(f"    ✗ Price not available (train ID mismatch or not found)")
-            prices[i][j] = price
-            # No extra wait needed - search_connection already waits for page load
+    # Queue all combinations where i < j (only forward direction)
+    queue = asyncio.Queue()
+    for pair in pairs:
+        queue.put_nowait(pair)
+
+    async def query(worker_page: Page, i: int, j: int):
+        """Query the price of segment i → j on one tab."""
+        nonlocal current_combination
+        current_combination += 1
+        # Use the departure time of the origin station (station i)
+        segment_departure_time = times[i]
+        # Use the train ID of the departure station (station i)
+        segment_train_id = train_ids[i] if train_ids else None
+        log(f"\n  [{current_combination}/{total_combinations}] Querying: {stations[i]} → {stations[j]} (dep. {segment_departure_time}, train: {segment_train_id})")
+        try:
+            async with asyncio.timeout(SEGMENT_TIMEOUT):
+                price = await get_ticket_price(worker_page, stations[i], stations[j], segment_departure_time, departure_date, segment_train_id)
+        except (TimeoutError, PlaywrightError) as e:
+            # A closed tab (or browser) cannot be recovered, everything else only costs this segment
+            if worker_page.is_closed():
+                raise
+            # Give up on this segment only; the tab may be mid-interaction, so start the next one from scratch
+            reason = str(e).splitlines()[0] if str(e) else 'no response'
+            log(f"    ✗ Price {stations[i]} → {stations[j]} failed ({type(e).__name__}: {reason}), marking as unavailable")
+            try:
+                await worker_page.goto("https://www.bahn.de", wait_until="domcontentloaded")
+            except PlaywrightError as reset_error:
+                log(f"    Could not reset tab: {reset_error}")
+            return
+        if price is not None:
+            log(f"    ✓ Price {stations[i]} → {stations[j]}: €{price:.2f}")
+        else:
+            log(f"    ✗ Price {stations[i]} → {stations[j]} not available (train ID mismatch or not found)")
+        prices[i, j] = np.nan if price is None else price
+
+    async def worker(worker_page: Page):
+        """Query segments from the queue on one tab until it is empty."""
+        while True:
+            try:
+                i, j = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await query(worker_page, i, j)
+
+    # One tab per worker, reusing the current page for the first one
+    num_workers = max(1, min(workers, total_combinations))
+    log(f"  Querying with {num_workers} parallel tab(s)")
+    worker_pages = [page]
+
+    # Failed segments are isolated in query; anything else cancels all workers.
+    # Tabs are opened inside the try so a failure while opening one still closes the others
+    try:
+        for _ in range(num_workers - 1):
+            worker_pages.append(await new_worker_page(page.context))
+
+        async with asyncio.TaskGroup() as tg:
+            for worker_page in worker_pages:
+                tg.create_task(worker(worker_page))
+    finally:
+        for worker_page in worker_pages[1:]:
+            await worker_page.close()
 
     log(f"\n✓ Price matrix complete: {current_combination} segments queried")
     return prices
 
 
 def write_tsv_file(filename: str, date: str, train: str, stations: List[str],
-                   times: List[str], prices: List[List[Optional[float]]]):
+                   times: List[str], prices: np.ndarray):
     """Write the price matrix to a TSV file in the expected format."""
     log(f"\nWriting TSV file: {filename}")
 
-    with open(filename, 'w', encoding='utf-8', newline='') as f:
+    # One large buffer: the whole matrix is flushed in a single write
+    with open(filename, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
         writer = csv.writer(f, delimiter='\t')
 
         # Row 1: Date, train number, and arrival times
@@ -472,22 +753,16 @@ def write_tsv_file(filename: str, date: str, train: str, stations: List[str],
         row2 = ['', ''] + stations
         writer.writerow(row2)
 
-        # Rows 3+: Departure time, station name, and prices
-        for i in range(len(stations)):
-            row = [times[i], stations[i]]
-            # Add empty cells for stations before i
-            row.extend([''] * i)
-            # Add prices for stations after i
-            for j in range(i, len(stations)):
-                if i == j:
-                    row.append('0')
-                elif prices[i][j] is not None:
-                    # Format with comma as decimal separator (German format)
-                    price_str = f"{prices[i][j]:.2f}".replace('.', ',')
-                    row.append(price_str)
-                else:
-                    row.append('?')
-            writer.writerow(row)
+        # Rows 3+: Departure time, station name, empty cells before the diagonal,
+        # then prices (German format with comma as decimal separator, '?' if unknown)
+        n = len(stations)
+        writer.writerows(
+            [times[i], stations[i]] + [''] * i + ['0'] + [
+                '?' if math.isnan(price) else f"{price:.2f}".replace('.', ',')
+                for price in prices[i, i + 1:].tolist()
+            ]
+            for i in range(n)
+        )
 
     log(f"TSV file written successfully!")
 
@@ -510,6 +785,13 @@ async def main():
                         help='Run browser in headed mode (visible browser window, default)')
     parser.add_argument('--connect', action='store_true',
                         help='Connect to existing browser at localhost:9222 (use debug_browser.py or Chrome with --remote-debugging-port=9222)')
+    parser.add_argument('--workers', '-w', type=int, default=4,
+                        help='Number of browser tabs querying segment prices in parallel (default: 4)')
+    parser.add_argument('--sparse', action='store_true',
+                        help='Across train changes, only query from each station to the first station of every later train run, '
+                             'and from the start of each run to the end of later runs')
+    parser.add_argument('--cache-ttl', type=int, default=3600,
+                        help=f'Reuse segment prices cached in {PRICE_CACHE_FILE} for this many seconds (default: 3600, 0 disables the cache)')
 
     args = parser.parse_args()
 
@@ -529,13 +811,15 @@ async def main():
     log(f"Date: {search_date}")
     log(f"Time: {args.time}")
 
+    get_ticket_price.ttl = args.cache_ttl
+
     # Generate output filename if not provided
     if args.output:
         output_file = args.output
     else:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_origin = re.sub(r'[^\w\-]', '_', args.origin)
-        safe_dest = re.sub(r'[^\w\-]', '_', args.destination)
+        safe_origin = _RE_UNSAFE.sub('_', args.origin)
+        safe_dest = _RE_UNSAFE.sub('_', args.destination)
         output_file = f"data/{safe_origin}_to_{safe_dest}_{timestamp}.tsv"
 
     log(f"Output file: {output_file}")
@@ -545,7 +829,7 @@ async def main():
             # Connect to existing browser at localhost:9222
             log(f"\nConnecting to existing browser at localhost:9222...")
             try:
-                browser = await p.chromium.connect_over_cdp("http://localhost:9222")
+                browser = await connect_cdp(p)
                 contexts = browser.contexts
                 if contexts:
                     context = contexts[0]
@@ -614,7 +898,7 @@ async def main():
                 train_display = f"Multiple ({', '.join(sorted(unique_trains))})"
 
             # Step 3: Get prices for all segment combinations
-            prices = await create_price_matrix(page, stations, times, args.time, search_date, train_ids)
+            prices = await create_price_matrix(page, stations, times, args.time, search_date, train_ids, args.workers, args.sparse)
 
             # Step 4: Write to TSV file
             write_tsv_file(output_file, search_date, train_display, stations, times, prices)
@@ -638,7 +922,13 @@ if __name__ == "__main__":
         log("\n\nInterrupted by user")
         sys.exit(1)
     except Exception as e:
-        log(f"\n\nError: {e}")
         import traceback
-        traceback.print_exc()
+        # Errors from the query workers arrive wrapped in an ExceptionGroup (asyncio.TaskGroup)
+        errors = [e]
+        while any(isinstance(error, BaseExceptionGroup) for error in errors):
+            errors = [sub for error in errors
+                      for sub in (error.exceptions if isinstance(error, BaseExceptionGroup) else [error])]
+        for error in errors:
+            log(f"\n\nError: {error}")
+            traceback.print_exception(error)
         sys.exit(1)
@@ -0,0 +1,122 @@
+"""Checks that the DP kernels, the batched DP and Dijkstra agree, and the TSV parser edge cases."""
+
+import math
+
+import numpy as np
+
+from find_cheapest_tickets import (PRUNE_MIN_STATIONS, _dp_kernel_loops, _dp_kernel_numpy, _jit_kernels,
+                                   _path_nodes_loops, _reconstruct_path, find_cheapest_route,
+                                   find_cheapest_route_dijkstra, find_cheapest_routes, parse_tsv_file)
+
+SIZES = (1, 2, 3, 7, 20, PRUNE_MIN_STATIONS - 1, PRUNE_MIN_STATIONS, PRUNE_MIN_STATIONS + 17)
+
+
+def random_prices(n, rng, holes=0.3):
+    """Upper-triangular price matrix like parse_tsv_file returns, with a share of unavailable (inf) tickets."""
+    prices = np.full((n, n), np.inf, order='F')
+    rows, cols = np.triu_indices(n, k=1)
+    # Longer segments tend to cost more, so splitting is sometimes but not always cheaper
+    values = (cols - rows) * rng.uniform(2.0, 6.0, len(rows)) + rng.uniform(5.0, 20.0, len(rows))
+    values[rng.random(len(rows)) < holes] = np.inf
+    prices[rows, cols] = values
+    return prices
+
+
+def assert_same_route(expected, actual):
+    """Same cost (up to float summation order) and the same tickets."""
+    (expected_cost, expected_path), (cost, path) = expected, actual
+    assert math.isclose(cost, expected_cost) or cost == expected_cost == np.inf, (cost, expected_cost)
+    assert path == expected_path, (path, expected_path)
+
+
+def route_from_kernel(kernel, prices):
+    """Run a single-matrix DP kernel and reconstruct the route to the last station."""
+    dp, prev = kernel(np.ascontiguousarray(prices.T))
+    return _reconstruct_path(dp, prev, prices.shape[0] - 1, _path_nodes_loops)
+
+
+def test_kernels_agree():
+    rng = np.random.default_rng(0)
+    jit_kernels = _jit_kernels()
+    for n in SIZES:
+        for holes in (0.0, 0.3, 0.8):
+            prices = random_prices(n, rng, holes)
+            expected = route_from_kernel(_dp_kernel_loops, prices)
+            assert_same_route(expected, route_from_kernel(_dp_kernel_numpy, prices))
+            assert_same_route(expected, find_cheapest_route([''] * n, prices))
+            if jit_kernels is not None:
+                dp_kernel, _, _ = jit_kernels
+                assert_same_route(expected, route_from_kernel(dp_kernel, prices))
+
+
+def test_batched_routes_with_mixed_sizes():
+    rng = np.random.default_rng(1)
+    matrices = [random_prices(n, rng) for n in SIZES + SIZES[::-1]]
+    expected = [route_from_kernel(_dp_kernel_loops, prices) for prices in matrices]
+    for expected_route, route in zip(expected, find_cheapest_routes(matrices)):
+        assert_same_route(expected_route, route)
+    assert find_cheapest_routes([]) == []
+
+
+def test_dijkstra_agrees_with_dp():
+    rng = np.random.default_rng(2)
+    for n in SIZES:
+        prices = random_prices(n, rng)
+        assert_same_route(find_cheapest_route([''] * n, prices), find_cheapest_route_dijkstra([''] * n, prices))
+
+
+def test_unreachable_destination():
+    prices = random_prices(5, np.random.default_rng(3), holes=0.0)
+    prices[:, 4] = np.inf
+    assert find_cheapest_route([''] * 5, prices) == (np.inf, [])
+    assert find_cheapest_routes([prices]) == [(np.inf, [])]
+
+
+def write_tsv(tmp_path, lines):
+    path = tmp_path / 'prices.tsv'
+    path.write_text(''.join('\t'.join(cells) + '\n' for cells in lines), encoding='utf-8')
+    return str(path)
+
+
+def test_parse_all_unavailable(tmp_path):
+    filepath = write_tsv(tmp_path, [
+        ['01.01.2026', 'ICE 1', '10:00', '11:00', '12:00'],
+        ['', '', 'A', 'B', 'C'],
+        ['10:00', 'A', '0', '?', '?'],
+        ['11:00', 'B', '', '0', '?'],
+        ['12:00', 'C', '', '', '0'],
+    ])
+    stations, times, prices = parse_tsv_file(filepath)
+    assert stations == ['A', 'B', 'C'] and times == ['10:00', '11:00', '12:00']
+    assert prices.shape == (3, 3) and np.isinf(prices).all()
+    assert find_cheapest_route(stations, prices) == (np.inf, [])
+
+
+def test_parse_short_and_missing_rows(tmp_path):
+    filepath = write_tsv(tmp_path, [
+        ['01.01.2026', 'ICE 1', '10:00', '11:00', '12:00'],
+        ['', '', 'A', 'B', 'C'],
+        ['10:00', 'A', '0', '5,50'],
+    ])
+    _, _, prices = parse_tsv_file(filepath)
+    expected = np.full((3, 3), np.inf)
+    expected[0, 1] = 5.5
+    np.testing.assert_array_equal(prices, expected)
+
+
+def test_parse_price_formats(tmp_path):
+    filepath = write_tsv(tmp_path, [
+        ['01.01.2026', 'ICE 1', '10:00', '11:00', '12:00', '13:00'],
+        ['', '', 'A', 'B', 'C', 'D'],
+        ['10:00', 'A', '0', '0,00', '17,', ' 3,8 '],
+        ['11:00', 'B', '', '0', 'abc', '?'],
+        ['12:00', 'C', '', '', '0', '1,2,3'],
+        ['13:00', 'D', '', '', '', '0'],
+    ])
+    _, _, prices = parse_tsv_file(filepath)
+    # "0" marks an unavailable ticket, but "0,00" is a (free) price
+    assert prices[0, 1] == 0.0
+    assert prices[0, 2] == 17.0
+    assert prices[0, 3] == 3.8
+    assert np.isinf([prices[1, 2], prices[1, 3], prices[2, 3]]).all()
+    assert np.isinf(np.diag(prices)).all()
@@ -0,0 +1,38 @@
+"""Checks that --sparse keeps every station reachable for the route analysis."""
+
+import itertools
+
+from scrape_bahn_prices import segment_pairs
+
+
+def reachable(n, pairs):
+    """Stations reachable from station 0 over the queried (forward) segments."""
+    seen = {0}
+    for i, j in sorted(pairs):
+        if i in seen:
+            seen.add(j)
+    return seen
+
+
+def test_dense_by_default():
+    assert segment_pairs(4, ['ICE 1'] * 4) == list(itertools.combinations(range(4), 2))
+
+
+def test_sparse_single_train_is_dense():
+    assert segment_pairs(5, ['ICE 1'] * 5, sparse=True) == segment_pairs(5)
+
+
+def test_sparse_keeps_all_stations_reachable():
+    for train_ids in (list('XXXXYYY'), list('XXYZZZ'), list('XYZ'), list('XXXXYYYYYZZ')):
+        n = len(train_ids)
+        pairs = segment_pairs(n, train_ids, sparse=True)
+        assert reachable(n, pairs) == set(range(n)), train_ids
+        assert (0, n - 1) in pairs
+        assert set(pairs) <= set(segment_pairs(n))
+
+
+def test_sparse_splits_at_the_transfer():
+    # X runs 0..3 (3 is the transfer station), Y runs 4..6
+    pairs = segment_pairs(7, list('XXXXYYY'), sparse=True)
+    assert (3, 4) in pairs and (4, 6) in pairs
+    assert (1, 5) not in pairs